@@ -5,15 +5,21 @@ Upload H5 → Run Inference → Download 3 Outputs (mask.npy, mask.png, output.n
 
 from fastapi import FastAPI, HTTPException, Depends, status, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, EmailStr
 from contextlib import asynccontextmanager
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
+import re
 import shutil
+import threading
 import uuid
 import logging
+import orjson
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -39,9 +45,26 @@ async def lifespan(app: FastAPI):
     """Initialize database on startup"""
     init_db()
     logger.info("Database initialized")
+    await run_in_threadpool(warm_up_upload_pool)
     yield
+    if _upload_pool is not None:
+        _upload_pool.shutdown(wait=False, cancel_futures=True)
 
-app = FastAPI(title="CloudSense API", version="2.0.0", lifespan=lifespan)
+class OrjsonResponse(Response):
+    """JSON response encoded with orjson, including numpy arrays and scalars"""
+    media_type = "application/json"
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+# orjson encodes the detection lists far faster than the stdlib encoder used
+# by the default JSONResponse; a local class, since FastAPI deprecated its own
+app = FastAPI(
+    title="CloudSense API",
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -59,8 +82,9 @@ app.add_middleware(
 
 # ===================== DIRECTORIES =====================
 
-OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BACKEND_DIR, "output")
+UPLOAD_DIR = os.path.join(BACKEND_DIR, "uploads")
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -133,8 +157,7 @@ async def health():
 # ===================== MOSDAC DOWNLOAD =====================
 
 import subprocess
-import json
-import glob
+from pathlib import Path
 from datetime import datetime, timedelta
 
 class MOSDACDownloadRequest(BaseModel):
@@ -142,7 +165,7 @@ class MOSDACDownloadRequest(BaseModel):
     password: str
     hours_back: int = 6  # Download data from last N hours
 
-MOSDAC_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset", "MOSDAC_Data")
+MOSDAC_DATA_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "dataset", "MOSDAC_Data")
 os.makedirs(MOSDAC_DATA_DIR, exist_ok=True)
 
 @app.post("/api/mosdac/download")
@@ -180,10 +203,10 @@ async def download_mosdac_data(request: MOSDACDownloadRequest):
         }
         
         # 3. Write config file
-        project_root = os.path.dirname(os.path.abspath(__file__))
+        project_root = BACKEND_DIR
         config_path = os.path.join(project_root, "config.json")
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(config_path, 'wb') as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
         
         logger.info(f"MOSDAC download: {start_time} to {end_time}")
         
@@ -207,9 +230,8 @@ async def download_mosdac_data(request: MOSDACDownloadRequest):
             raise HTTPException(status_code=500, detail=f"Download failed: {result.stderr[:500]}")
         
         # 5. Find downloaded H5 files
-        h5_files = glob.glob(os.path.join(MOSDAC_DATA_DIR, "**", "*.h5"), recursive=True)
-        h5_files.extend(glob.glob(os.path.join(MOSDAC_DATA_DIR, "*.h5")))
-        h5_files = sorted(set(h5_files))
+        # One recursive walk (it already covers the top level), no dedup pass
+        h5_files = sorted(str(p) for p in Path(MOSDAC_DATA_DIR).rglob("*.h5"))
         
         if not h5_files:
             return {
@@ -221,8 +243,8 @@ async def download_mosdac_data(request: MOSDACDownloadRequest):
         logger.info(f"Downloaded {len(h5_files)} files, running inference...")
         
         # 6. Run inference on each file
-        pipeline = get_inference_pipeline()
         results = []
+        jobs = []
         
         for h5_path in h5_files:
             analysis_id = str(uuid.uuid4())
@@ -234,9 +256,12 @@ async def download_mosdac_data(request: MOSDACDownloadRequest):
                 file_path=h5_path,
                 source="mosdac_download"
             )
-            
-            result = pipeline.process_file(h5_path, OUTPUT_DIR, analysis_id)
-            
+            jobs.append((h5_path, analysis_id))
+        
+        # Files are independent, so the pipeline fans them out across processes
+        pipeline_results = await run_in_threadpool(run_batch_job, jobs)
+        
+        for (h5_path, analysis_id), result in zip(jobs, pipeline_results):
             if result["success"]:
                 # Persist results to DB so Analysis/Dashboard/Exports pages can find them
                 update_analysis_status(analysis_id, "complete")
@@ -360,17 +385,161 @@ def get_inference_pipeline():
     return _inference_pipeline
 
 
+_upload_pool = None
+_upload_workers = 0
+_upload_pool_lock = threading.Lock()
+# GPU inference stays in this process (one CUDA context, one model copy);
+# the lock keeps concurrent uploads from sharing the device at once
+_gpu_lock = threading.Lock()
+
+def get_upload_pool():
+    """Lazily start the CPU worker processes that run upload inference off the event loop"""
+    global _upload_pool, _upload_workers
+    with _upload_pool_lock:
+        if _upload_pool is None:
+            pipeline = get_inference_pipeline()
+            workers = min(pipeline.MAX_WORKERS, os.cpu_count() or 1)
+            _upload_pool = pipeline.worker_pool(workers)
+            _upload_workers = workers
+            logger.info(f"Upload worker pool started ({workers} processes)")
+        return _upload_pool
+
+
+def restart_upload_pool(broken):
+    """Replace a pool left broken by a dead worker (OOM, native crash)"""
+    global _upload_pool
+    with _upload_pool_lock:
+        # Concurrent failures on the same pool restart it only once
+        if _upload_pool is broken:
+            logger.warning("Upload worker pool broken, restarting it")
+            broken.shutdown(wait=False, cancel_futures=True)
+            _upload_pool = None
+
+
+def run_in_gpu(method, *args):
+    """Run a parent-process pipeline method with exclusive use of the GPU"""
+    with _gpu_lock:
+        return method(*args)
+
+
+async def run_upload_job(is_image: bool, job: tuple) -> dict:
+    """Run process_file/process_image for one (path, output_dir, analysis_id) job"""
+    pipeline = get_inference_pipeline()
+    if pipeline.device != "cpu":
+        method = pipeline.process_image if is_image else pipeline.process_file
+        return await run_in_threadpool(run_in_gpu, method, *job)
+    
+    from inference_engine import process_file_in_worker, process_image_in_worker
+    worker = process_image_in_worker if is_image else process_file_in_worker
+    loop = asyncio.get_running_loop()
+    pool = await run_in_threadpool(get_upload_pool)
+    try:
+        future = loop.run_in_executor(pool, worker, job)
+    except BrokenProcessPool:
+        # Broken before this job was submitted: it is safe to run on fresh workers
+        restart_upload_pool(pool)
+        pool = await run_in_threadpool(get_upload_pool)
+        future = loop.run_in_executor(pool, worker, job)
+    try:
+        return await future
+    except BrokenProcessPool as e:
+        # The job may be what killed the worker (OOM, native crash), so it is
+        # failed rather than retried; later uploads get fresh workers
+        restart_upload_pool(pool)
+        logger.error(f"Inference worker died on {job[0]}: {e}")
+        return {"success": False, "error": "Inference worker crashed while processing this file"}
+
+
+def run_batch_job(jobs: list) -> list:
+    """Run process_files for (h5_path, analysis_id) jobs on the shared workers (blocking)"""
+    pipeline = get_inference_pipeline()
+    if pipeline.device != "cpu":
+        return run_in_gpu(pipeline.process_files, jobs, OUTPUT_DIR)
+    
+    pool = get_upload_pool()
+    try:
+        return pipeline.process_files(jobs, OUTPUT_DIR, executor=pool)
+    except BrokenProcessPool as e:
+        # Same as uploads: no retry of a batch that may hold the crashing file
+        restart_upload_pool(pool)
+        logger.error(f"Inference worker died during a batch of {len(jobs)} files: {e}")
+        return [{"success": False, "error": "Inference worker crashed during this batch"} for _ in jobs]
+
+
+def warm_up_upload_pool():
+    """Load the model in every upload worker now, not on the first user request"""
+    try:
+        from inference_engine import warm_up_worker
+        pipeline = get_inference_pipeline()
+        if pipeline.device != "cpu":
+            run_in_gpu(pipeline.warm_up)
+        else:
+            pool = get_upload_pool()
+            list(pool.map(warm_up_worker, range(_upload_workers)))
+        logger.info("Upload inference warmed up")
+    except Exception as e:
+        logger.warning(f"Upload worker warm-up skipped: {e}")
+
+
+# Upload validation constants
+ALLOWED_EXTENSIONS = frozenset({'.h5', '.hdf5', '.png', '.jpg', '.jpeg'})
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg'})
+MAX_FILE_SIZE_MB = 500
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+UNSAFE_FILENAME_RE = re.compile(r'[^A-Za-z0-9._\-]+')
+
+# Starlette spools uploads in memory up to 1 MiB, then to a temp file on disk
+UPLOAD_SPOOL_BYTES = 1 << 20
+
+# Uploads can be hundreds of MB: copy in 8 MiB blocks so the fallback path
+# makes ~128x fewer read/write syscalls than the default 64 KiB
+UPLOAD_COPY_CHUNK = 8 << 20
+
+def save_upload_file(upload: UploadFile, file_path: str, file_size: int):
+    """Copy an uploaded file to disk (blocking; run it in a thread)"""
+    try:
+        with open(file_path, "wb") as buffer:
+            # Spooled-to-disk uploads are copied file-to-file by the kernel,
+            # with no bounce through Python buffers
+            if file_size > UPLOAD_SPOOL_BYTES and hasattr(os, "sendfile"):
+                try:
+                    upload.file.flush()
+                    in_fd, out_fd = upload.file.fileno(), buffer.fileno()
+                    offset = 0
+                    while offset < file_size:
+                        sent = os.sendfile(out_fd, in_fd, offset, file_size - offset)
+                        if sent == 0:
+                            raise OSError(f"sendfile stopped at {offset} of {file_size} bytes")
+                        offset += sent
+                    return
+                except OSError:
+                    # e.g. platforms where sendfile needs a socket: start over below
+                    upload.file.seek(0)
+                    buffer.seek(0)
+                    buffer.truncate()
+            
+            shutil.copyfileobj(upload.file, buffer, length=UPLOAD_COPY_CHUNK)
+    except BaseException:
+        # Don't leave a partial upload behind for a later listing to pick up
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        raise
+
+
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
     """
     Upload H5 or image file and run inference.
     Returns analysis_id with paths to outputs: satellite.png, mask.npy, mask.png, and output.nc (H5 only)
     """
+    analysis_id = None
     try:
         # 1. Validate file type
-        ALLOWED_EXTENSIONS = {'.h5', '.hdf5', '.png', '.jpg', '.jpeg'}
-        IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
-        file_ext = os.path.splitext(file.filename)[1].lower()
+        # Sanitized name is for the disk path and logs; the DB and response keep the original
+        safe_filename = UNSAFE_FILENAME_RE.sub('_', os.path.basename(file.filename or ''))
+        file_ext = os.path.splitext(safe_filename)[1].lower()
         if file_ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -378,12 +547,14 @@ async def upload_file(file: UploadFile = File(...)):
             )
         
         # 2. Validate file size (max 500MB)
-        MAX_FILE_SIZE_MB = 500
-        file.file.seek(0, 2)
-        file_size = file.file.tell()
-        file.file.seek(0)
+        # Starlette counts the bytes while parsing the form; seek only if it didn't
+        file_size = file.size
+        if file_size is None:
+            file.file.seek(0, 2)
+            file_size = file.file.tell()
+            file.file.seek(0)
         
-        if file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
+        if file_size > MAX_FILE_SIZE_BYTES:
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 detail=f"File too large. Max: {MAX_FILE_SIZE_MB}MB"
@@ -396,10 +567,11 @@ async def upload_file(file: UploadFile = File(...)):
         storage_filename = f"{analysis_id}{file_ext}"
         file_path = os.path.join(UPLOAD_DIR, storage_filename)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Disk copy on a thread and inference in a worker process, so the
+        # event loop keeps serving other requests meanwhile
+        await run_in_threadpool(save_upload_file, file, file_path, file_size)
         
-        logger.info(f"File uploaded: {file.filename} -> {analysis_id}")
+        logger.info(f"File uploaded: {safe_filename} -> {analysis_id}")
         
         # 5. Create analysis record
         create_analysis(
@@ -410,13 +582,8 @@ async def upload_file(file: UploadFile = File(...)):
         )
         
         # 6. Run inference (use appropriate method based on file type)
-        logger.info(f"Running inference on {file.filename}...")
-        pipeline = get_inference_pipeline()
-        
-        if file_ext in IMAGE_EXTENSIONS:
-            result = pipeline.process_image(file_path, OUTPUT_DIR, analysis_id)
-        else:
-            result = pipeline.process_file(file_path, OUTPUT_DIR, analysis_id)
+        logger.info(f"Running inference on {safe_filename}...")
+        result = await run_upload_job(file_ext in IMAGE_EXTENSIONS, (file_path, OUTPUT_DIR, analysis_id))
         
         if result["success"]:
             update_analysis_status(analysis_id, "complete")
@@ -450,20 +617,31 @@ async def upload_file(file: UploadFile = File(...)):
         raise
     except Exception as e:
         logger.error(f"Upload Error: {e}")
+        if analysis_id is not None:
+            update_analysis_status(analysis_id, "failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ===================== DOWNLOAD OUTPUTS =====================
 
+# Downloadable outputs and their media types
+OUTPUT_MEDIA_TYPES = {
+    "satellite.png": "image/png",
+    "mask.npy": "application/octet-stream",
+    "mask.png": "image/png",
+    "overlay.png": "image/png",
+    "output.nc": "application/x-netcdf"
+}
+
 @app.get("/api/download/{analysis_id}/{filename}")
 async def download_output(analysis_id: str, filename: str):
     """
     Download output files: satellite.png, mask.npy, mask.png, overlay.png, output.nc
     """
     # Validate filename
-    ALLOWED_FILES = {"satellite.png", "mask.npy", "mask.png", "overlay.png", "output.nc"}
-    if filename not in ALLOWED_FILES:
-        raise HTTPException(status_code=400, detail=f"Invalid file. Options: {ALLOWED_FILES}")
+    media_type = OUTPUT_MEDIA_TYPES.get(filename)
+    if media_type is None:
+        raise HTTPException(status_code=400, detail=f"Invalid file. Options: {set(OUTPUT_MEDIA_TYPES)}")
     
     # Build file path
     file_path = os.path.join(OUTPUT_DIR, analysis_id, filename)
@@ -471,50 +649,59 @@ async def download_output(analysis_id: str, filename: str):
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Set media type
-    media_types = {
-        "satellite.png": "image/png",
-        "mask.npy": "application/octet-stream",
-        "mask.png": "image/png",
-        "overlay.png": "image/png",
-        "output.nc": "application/x-netcdf"
-    }
-    
     return FileResponse(
         file_path,
-        media_type=media_types.get(filename, "application/octet-stream"),
-        filename=f"{analysis_id}_{filename}"
+        media_type=media_type,
+        filename=f"{analysis_id}_{filename}",
+        # Outputs are written once under a fresh analysis ID and never change
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
     )
 
 
 # ===================== EXPORTS LIST =====================
 
-@app.get("/api/exports")
-async def list_exports():
-    """List all available exports"""
+def scan_exports() -> list:
+    """Collect the output folders and their files (blocking; run it in a thread)"""
     exports = []
     
-    if os.path.exists(OUTPUT_DIR):
-        for analysis_id in os.listdir(OUTPUT_DIR):
-            analysis_dir = os.path.join(OUTPUT_DIR, analysis_id)
-            if os.path.isdir(analysis_dir):
-                files = os.listdir(analysis_dir)
-                exports.append({
-                    "analysis_id": analysis_id,
-                    "files": files,
-                    "download_urls": {
-                        "satellite_png": f"/api/download/{analysis_id}/satellite.png" if "satellite.png" in files else None,
-                        "mask_npy": f"/api/download/{analysis_id}/mask.npy" if "mask.npy" in files else None,
-                        "mask_png": f"/api/download/{analysis_id}/mask.png" if "mask.png" in files else None,
-                        "netcdf": f"/api/download/{analysis_id}/output.nc" if "output.nc" in files else None
-                    }
-                })
+    # scandir reports the entry type from the directory listing itself, so
+    # there is no separate exists()/isdir() stat per analysis folder
+    try:
+        with os.scandir(OUTPUT_DIR) as entries:
+            analysis_dirs = [entry for entry in entries if entry.is_dir()]
+    except FileNotFoundError:
+        analysis_dirs = []
+    
+    for entry in analysis_dirs:
+        analysis_id = entry.name
+        files = os.listdir(entry.path)
+        exports.append({
+            "analysis_id": analysis_id,
+            "files": files,
+            "download_urls": {
+                "satellite_png": f"/api/download/{analysis_id}/satellite.png" if "satellite.png" in files else None,
+                "mask_npy": f"/api/download/{analysis_id}/mask.npy" if "mask.npy" in files else None,
+                "mask_png": f"/api/download/{analysis_id}/mask.png" if "mask.png" in files else None,
+                "netcdf": f"/api/download/{analysis_id}/output.nc" if "output.nc" in files else None
+            }
+        })
     
     return exports
 
 
+@app.get("/api/exports")
+async def list_exports():
+    """List all available exports"""
+    # One thread for the whole scan keeps the directory I/O off the event loop
+    return OrjsonResponse(await run_in_threadpool(scan_exports))
+
+
 # ===================== RECENT ANALYSES =====================
 
+# The read endpoints below return plain dicts/lists from SQLite and orjson,
+# so they build OrjsonResponse directly: returning the data instead would
+# first walk it through FastAPI's jsonable_encoder
+
 @app.get("/api/analyses/recent")
 async def list_recent_analyses(limit: int = 10):
     """Get list of recent analyses with parsed results"""
@@ -525,11 +712,11 @@ async def list_recent_analyses(limit: int = 10):
         if analysis.get('results'):
             try:
                 if isinstance(analysis['results'], str):
-                    analysis['results'] = json.loads(analysis['results'])
-            except json.JSONDecodeError:
+                    analysis['results'] = orjson.loads(analysis['results'])
+            except orjson.JSONDecodeError:
                 analysis['results'] = {}
     
-    return analyses
+    return OrjsonResponse(analyses)
 
 
 # ===================== DASHBOARD ENDPOINTS =====================
@@ -537,13 +724,13 @@ async def list_recent_analyses(limit: int = 10):
 @app.get("/api/dashboard/stats")
 async def dashboard_stats():
     """Get aggregated stats for the dashboard."""
-    return get_dashboard_stats()
+    return OrjsonResponse(get_dashboard_stats())
 
 
 @app.get("/api/analysis/clusters")
 async def analysis_clusters(limit: int = 50):
     """Get all recent clusters for the map/table."""
-    return get_all_recent_clusters(limit)
+    return OrjsonResponse(get_all_recent_clusters(limit))
 
 
 if __name__ == "__main__":
@@ -4,15 +4,32 @@ Password hashing and JWT token management.
 """
 
 import bcrypt
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import hashlib
+import hmac
 import jwt
 import os
+import threading
+import time
 
 # JWT Configuration - use default secret for development
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-please-change-in-production-12345678")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Recently verified logins, keyed by an HMAC fingerprint of (hash, password).
+# The password itself is never stored; entries expire after a minute.
+VERIFY_CACHE_SIZE = 10_000
+VERIFY_CACHE_TTL = 60
+_verify_cache = OrderedDict()
+_verify_lock = threading.Lock()
+
+# Decoded payloads of recently seen tokens; expiry is re-checked on every hit.
+TOKEN_CACHE_SIZE = 4096
+_token_cache = OrderedDict()
+_token_lock = threading.Lock()
+
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
@@ -20,19 +37,41 @@ def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
+def _verify_key(password: str, password_hash: str) -> bytes:
+    digest = hashlib.sha256(password.encode('utf-8')).hexdigest()
+    return hmac.new(JWT_SECRET.encode('utf-8'), (password_hash + digest).encode('utf-8'), 'sha256').digest()
+
+
 def verify_password(password: str, password_hash: str) -> bool:
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    """Verify password against hash, skipping bcrypt for recent successes"""
+    key = _verify_key(password, password_hash)
+    now = time.monotonic()
+    with _verify_lock:
+        expires = _verify_cache.get(key)
+        if expires is not None:
+            if expires > now:
+                return True
+            del _verify_cache[key]
+
+    if not bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
+        return False
+
+    with _verify_lock:
+        _verify_cache[key] = now + VERIFY_CACHE_TTL
+        _verify_cache.move_to_end(key)
+        if len(_verify_cache) > VERIFY_CACHE_SIZE:
+            _verify_cache.popitem(last=False)
+    return True
 
 
 def create_jwt_token(user_id: int, email: str) -> dict:
     """Create JWT token"""
-    expiration = datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
+    issued_at = datetime.utcnow()
     payload = {
         "sub": str(user_id),
         "email": email,
-        "exp": expiration,
-        "iat": datetime.utcnow()
+        "exp": issued_at + timedelta(hours=JWT_EXPIRATION_HOURS),
+        "iat": issued_at
     }
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return {
@@ -44,10 +83,23 @@ def create_jwt_token(user_id: int, email: str) -> dict:
 
 def verify_jwt_token(token: str) -> dict:
     """Verify and decode JWT token"""
+    with _token_lock:
+        payload = _token_cache.get(token)
+        if payload is not None:
+            if payload["exp"] > time.time():
+                _token_cache.move_to_end(token)
+                return payload
+            del _token_cache[token]
+
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise Exception("Token has expired")
     except jwt.InvalidTokenError:
         raise Exception("Invalid token")
+
+    with _token_lock:
+        _token_cache[token] = payload
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
@@ -154,7 +154,7 @@ class Settings(BaseSettings):
     def validate_paths(cls, v):
         """Ensure parent directories exist."""
         parent = os.path.dirname(v)
-        if parent and not os.path.exists(parent):
+        if parent:
             os.makedirs(parent, exist_ok=True)
         return v
     
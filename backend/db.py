@@ -5,14 +5,35 @@ Simple SQLite database for user authentication and analysis tracking.
 
 import sqlite3
 import os
-import json
+import threading
+import time
+import orjson
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Dict, List, Any
 
 # Database path
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cloudsense.db")
 
 
+def _dumps(obj: Any) -> str:
+    """Serialize to JSON text; numpy scalars/arrays from the pipeline are encoded natively."""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+
+
+@lru_cache(maxsize=32)
+def _parse_results(results_json: str) -> Any:
+    """
+    Parse a stored results blob, memoized on its text.
+    
+    Dashboard/cluster endpoints re-read the same few recent rows on every
+    poll; a stored blob only changes when it is rewritten, which yields a new
+    key. The returned object is shared, so callers must not mutate it.
+    """
+    return orjson.loads(results_json)
+
+
 def get_connection():
     """Get database connection."""
     conn = sqlite3.connect(DB_PATH)
@@ -88,8 +109,25 @@ def get_user_by_email(email: str) -> Optional[Dict]:
     return None
 
 
+# Short-lived LRU cache for the per-request auth lookup by user ID
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 30
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
 def get_user_by_id(user_id: int) -> Optional[Dict]:
     """Get user by ID."""
+    now = time.monotonic()
+    with _user_cache_lock:
+        hit = _user_cache.get(user_id)
+        if hit is not None:
+            expires, user = hit
+            if expires > now:
+                _user_cache.move_to_end(user_id)
+                return dict(user)
+            del _user_cache[user_id]
+
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
@@ -97,7 +135,13 @@ def get_user_by_id(user_id: int) -> Optional[Dict]:
     conn.close()
     
     if row:
-        return dict(row)
+        user = dict(row)
+        with _user_cache_lock:
+            _user_cache[user_id] = (now + USER_CACHE_TTL, user)
+            _user_cache.move_to_end(user_id)
+            if len(_user_cache) > USER_CACHE_SIZE:
+                _user_cache.popitem(last=False)
+        return dict(user)
     return None
 
 
@@ -169,7 +213,7 @@ def save_analysis_results(analysis_id: str, results: Any):
     
     cursor.execute(
         'UPDATE analyses SET results = ? WHERE id = ?',
-        (json.dumps(results), analysis_id)
+        (_dumps(results), analysis_id)
     )
     conn.commit()
     conn.close()
@@ -184,7 +228,7 @@ def get_analysis_results(analysis_id: str) -> Optional[Any]:
     conn.close()
     
     if row and row['results']:
-        return json.loads(row['results'])
+        return orjson.loads(row['results'])
     return None
 
 
@@ -195,7 +239,7 @@ def save_analysis_metadata(analysis_id: str, metadata: Dict):
     
     cursor.execute(
         'UPDATE analyses SET metadata = ? WHERE id = ?',
-        (json.dumps(metadata), analysis_id)
+        (_dumps(metadata), analysis_id)
     )
     conn.commit()
     conn.close()
@@ -210,7 +254,7 @@ def get_analysis_metadata(analysis_id: str) -> Optional[Dict]:
     conn.close()
     
     if row and row['metadata']:
-        return json.loads(row['metadata'])
+        return orjson.loads(row['metadata'])
     return None
 
 
@@ -235,22 +279,28 @@ def get_dashboard_stats() -> Dict:
     
     if row and row['results']:
         try:
-            results = json.loads(row['results'])
+            results = _parse_results(row['results'])
             detections = results.get('detections', [])
             
             stats["active_tccs"] = len(detections)
             
             if detections:
-                min_bts = [d.get('min_bt', 0) for d in detections]
-                radii = [d.get('radius_km', 0) for d in detections]
+                # Single pass over detections for all aggregates
+                min_bt = float('inf')
+                radius_sum = 0.0
+                bt_sum = 0.0
+                for d in detections:
+                    min_bt = min(min_bt, d.get('min_bt', 0))
+                    radius_sum += d.get('radius_km', 0)
+                    bt_sum += d.get('mean_bt', 0)
                 
-                stats["min_bt"] = min(min_bts) if min_bts else 0
-                stats["mean_radius"] = sum(radii) / len(radii) if radii else 0
+                stats["min_bt"] = min_bt
+                stats["mean_radius"] = radius_sum / len(detections)
                 
                 # Approximate cloud top height from BT (simple lapse rate approximation)
                 # Height ~ (SurfaceTemp - BT) / LapseRate
                 # Ensuring positive height
-                avg_bt = sum(d.get('mean_bt', 0) for d in detections) / len(detections)
+                avg_bt = bt_sum / len(detections)
                 stats["avg_cloud_height"] = max(0, (300 - avg_bt) / 6.5) 
                 
         except Exception as e:
@@ -273,26 +323,31 @@ def get_all_recent_clusters(limit: int = 50) -> List[Dict]:
     all_clusters = []
     
     for row in rows:
+        if len(all_clusters) >= limit:
+            break  # enough clusters already; skip parsing older analyses
         if row['results']:
             try:
-                results = json.loads(row['results'])
+                results = _parse_results(row['results'])
                 detections = results.get('detections', [])
                 timestamp = row['upload_timestamp']
+                analysis_id = row['id']
+                source = row['filename']
                 
                 for d in detections:
+                    get = d.get
                     cluster = {
-                        "id": f"TCC-{d.get('cluster_id')}",
-                        "analysis_id": row['id'],
-                        "centroidLat": d.get('centroid_lat'),
-                        "centroidLon": d.get('centroid_lon'),
-                        "avgBT": d.get('mean_bt'),
-                        "minBT": d.get('min_bt'),
-                        "radius": d.get('radius_km'),
-                        "area": d.get('area_km2'),
+                        "id": f"TCC-{get('cluster_id')}",
+                        "analysis_id": analysis_id,
+                        "centroidLat": get('centroid_lat'),
+                        "centroidLon": get('centroid_lon'),
+                        "avgBT": get('mean_bt'),
+                        "minBT": get('min_bt'),
+                        "radius": get('radius_km'),
+                        "area": get('area_km2'),
                         "status": "active", # Placeholder
-                        "source": row['filename'],
+                        "source": source,
                         "lastUpdate": timestamp,
-                        "intensity": (300 - d.get('min_bt', 300)) / 100 # Normalize 0-1
+                        "intensity": (300 - get('min_bt', 300)) / 100 # Normalize 0-1
                     }
                     all_clusters.append(cluster)
             except:
@@ -11,6 +11,10 @@ FIXES APPLIED:
 """
 
 import os
+import re
+import shutil
+import traceback
+import multiprocessing
 import numpy as np
 import h5py
 import torch
@@ -19,16 +23,101 @@ import xarray as xr
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
+from matplotlib.colors import ListedColormap
+from matplotlib.figure import Figure
 import segmentation_models_pytorch as smp
-import albumentations as A
-from albumentations.pytorch import ToTensorV2
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from scipy import ndimage
 from typing import List, Dict, Tuple, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Overlay mask colormap: dark background, bright cyan for TCC
+TCC_CMAP = ListedColormap(['#0a0a1a', '#00e5ff'])
+
+# Structuring element for mask cleanup (fixed size, built once)
+MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+
+# INSAT-3D filename stamp, e.g. 3RIMG_30MAY2024_0015_L1B_STD_V01R00.h5
+_TS_RE = re.compile(r'(\d{2})([A-Za-z]{3})(\d{4})_(\d{2})(\d{2})')
+_MONTHS = {
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+    'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12,
+}
+
+
+@lru_cache(maxsize=4)
+def _load_unet(model_path: str, device: str) -> torch.nn.Module:
+    """
+    Load U-Net weights once per (path, device) and share the eval-mode module.
+    
+    Every InferencePipeline in the process reuses the same handle, so weights
+    are read from disk and moved to the device only once. Callers must treat
+    the module as read-only (inference under no_grad, no in-place changes).
+    """
+    model = smp.Unet(
+        encoder_name="mobilenet_v2",
+        encoder_weights=None,
+        in_channels=1,
+        classes=1,
+    )
+    model.load_state_dict(torch.load(model_path, map_location=device, weights_only=True))
+    model.to(device)
+    model.eval()
+    
+    logger.info(f"Model loaded from {model_path}")
+    if device == "cpu":
+        model = _freeze_unet(model, device)
+    return model
+
+
+def _freeze_unet(model: torch.nn.Module, device: str, img_size: int = 512) -> torch.nn.Module:
+    """
+    Trace and freeze the U-Net for CPU inference, falling back to eager mode.
+    
+    Freezing folds BatchNorm into the convolutions and drops per-op Python
+    dispatch. GPUs keep the eager module, which runs under autocast.
+    
+    torch.jit is deprecated: its warnings are left visible, and once trace or
+    freeze is gone (or fails) the eager module is used instead.
+    """
+    if not (hasattr(torch.jit, "trace") and hasattr(torch.jit, "freeze")):
+        logger.warning("torch.jit.trace/freeze unavailable, using eager model")
+        return model
+    
+    example = torch.zeros(1, 1, img_size, img_size, device=device)
+    try:
+        with torch.no_grad():
+            frozen = torch.jit.freeze(torch.jit.trace(model, example))
+            for _ in range(2):  # warm-up runs the JIT optimization passes
+                frozen(example)
+    except Exception as e:
+        logger.warning(f"TorchScript freeze failed, using eager model: {e}")
+        return model
+    
+    logger.info("Model traced and frozen with torch.jit (deprecated) for CPU inference")
+    return frozen
+
+
+@lru_cache(maxsize=4)
+def _synthetic_coords(h: int, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Synthetic lat/lon grids for an (h, w) frame, built once per shape.
+    
+    The grids are shared between calls, so they are returned read-only.
+    """
+    lat_1d = np.linspace(30.0, 0.0, h).astype(np.float32)  # North to South
+    lon_1d = np.linspace(60.0, 100.0, w).astype(np.float32)  # West to East
+    # Broadcast straight into float32 grids (meshgrid builds float64 copies first)
+    lat_grid = np.ascontiguousarray(np.broadcast_to(lat_1d[:, None], (h, w)))
+    lon_grid = np.ascontiguousarray(np.broadcast_to(lon_1d[None, :], (h, w)))
+    lat_grid.flags.writeable = False
+    lon_grid.flags.writeable = False
+    return lat_grid, lon_grid
+
 
 class InferencePipeline:
     """
@@ -49,11 +138,24 @@ class InferencePipeline:
     BT_COLD_THRESHOLD = 218.0   # Kelvin - TCC cloud tops
     MIN_BT = 180.0              # Normalization min
     MAX_BT = 320.0              # Normalization max
+    BT_SCALE = 1.0 / (MAX_BT - MIN_BT)  # Normalization reciprocal (multiply, not divide)
     
     # Geophysical constraints
     MIN_AREA_KM2 = 5000.0       # LOWERED to 5000 for better detection
     PIXEL_RESOLUTION_KM = 4.0   # INSAT-3D native resolution (km/pixel)
     
+    # Output rendering
+    MASK_PNG_SIZE = 1200        # Long side of mask.png in px (the former 8 in x 150 dpi figure)
+    
+    # Batch processing
+    MAX_WORKERS = 4             # Worker processes for multi-file batches (CPU)
+    BATCH_SIZE = 8              # Frames per U-Net forward pass (GPU)
+    
+    # HDF5 chunk cache: large enough to hold a full INSAT frame's chunks so
+    # each compressed chunk is decompressed once (default is only 1 MiB)
+    H5_CHUNK_CACHE_BYTES = 64 * 1024 * 1024
+    H5_CHUNK_CACHE_SLOTS = 100003  # prime, ~100x the chunk count of a frame
+    
     # Dynamic dataset discovery keys
     IR_CANDIDATES = ['IMG_TIR1', 'TIR1', 'IR', 'IR1', 'IR_BT', 'Band4', 'IMG_TIR']
     LUT_CANDIDATES = ['IMG_TIR1_TEMP', 'TIR1_TEMP', 'LUT', 'TEMP_LUT']
@@ -88,17 +190,7 @@ class InferencePipeline:
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(f"Model not found: {self.model_path}")
         
-        self.model = smp.Unet(
-            encoder_name="mobilenet_v2",
-            encoder_weights=None,
-            in_channels=1,
-            classes=1,
-        )
-        self.model.load_state_dict(torch.load(self.model_path, map_location=self.device, weights_only=True))
-        self.model.to(self.device)
-        self.model.eval()
-        
-        logger.info(f"Model loaded from {self.model_path}")
+        self.model = _load_unet(os.path.abspath(self.model_path), self.device)
         return self.model
     
     def _find_dataset(self, f, candidates: list):
@@ -117,9 +209,28 @@ class InferencePipeline:
                 return f[name]
         return None
     
+    def _read_direct(self, dataset, frame: Optional[int] = None, dtype=None) -> np.ndarray:
+        """
+        Read an H5 dataset (or one frame of a 3-D dataset) into a new array.
+        
+        read_direct fills a preallocated buffer from HDF5's C layer, avoiding
+        the slower high-level __getitem__ path and its temporary copy. With
+        dtype set, HDF5 converts while reading (no read-then-astype copy).
+        """
+        dtype = dtype or dataset.dtype
+        if frame is None:
+            out = np.empty(dataset.shape, dtype=dtype)
+            dataset.read_direct(out)
+        else:
+            out = np.empty(dataset.shape[1:], dtype=dtype)
+            dataset.read_direct(out, source_sel=np.s_[frame])
+        return out
+    
     def _load_h5(self, h5_path: str) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
         """Load INSAT-3D H5 file with dynamic discovery."""
-        with h5py.File(h5_path, 'r') as f:
+        with h5py.File(h5_path, 'r',
+                       rdcc_nbytes=self.H5_CHUNK_CACHE_BYTES,
+                       rdcc_nslots=self.H5_CHUNK_CACHE_SLOTS) as f:
             logger.info(f"H5 keys: {list(f.keys())}")
             
             # 1. Find IR dataset
@@ -134,33 +245,43 @@ class InferencePipeline:
             if ir_dataset is None:
                 raise ValueError(f"No IR data found in H5 file. Available keys: {list(f.keys())}")
             
-            raw_counts = ir_dataset[0] if len(ir_dataset.shape) == 3 else ir_dataset[:]
+            if len(ir_dataset.shape) == 3:
+                raw_counts = self._read_direct(ir_dataset, frame=0)
+            else:
+                raw_counts = self._read_direct(ir_dataset)
             
             # 2. Apply LUT if available
             lut_dataset = self._find_dataset(f, self.LUT_CANDIDATES)
             if lut_dataset is not None:
-                lut = lut_dataset[:]
-                raw_counts = np.clip(raw_counts, 0, len(lut) - 1)
-                irbt = lut[raw_counts].astype(np.float32)
+                lut = np.asarray(lut_dataset[:], dtype=np.float32)
+                if raw_counts.dtype == np.uint8 and len(lut) == 256:
+                    irbt = cv2.LUT(raw_counts, lut)
+                else:
+                    # take(mode='clip') clamps, gathers and casts in one pass
+                    irbt = np.take(lut, raw_counts, mode='clip')
                 logger.info("Applied LUT for brightness temperature conversion")
             else:
                 irbt = raw_counts.astype(np.float32)
                 logger.warning("No LUT found, using raw values as IRBT")
             
             # 3. Handle NaN/fill values
-            irbt = np.where(irbt < 100, np.nan, irbt)
-            irbt = np.nan_to_num(irbt, nan=np.nanmean(irbt) if not np.all(np.isnan(irbt)) else 250.0)
+            # Fill values (< 100 K) and NaNs get the mean of the valid pixels,
+            # written in place rather than via NaN-marked full-frame copies
+            invalid = ~(irbt >= 100)
+            if invalid.any():
+                valid = irbt[~invalid]
+                irbt[invalid] = valid.mean() if valid.size else 250.0
             
             # 4. Lat/Lon (optional)
             lat, lon = None, None
             
             lat_dataset = self._find_dataset(f, self.LAT_CANDIDATES)
             if lat_dataset is not None:
-                lat = lat_dataset[:].astype(np.float32)
+                lat = self._read_direct(lat_dataset, dtype=np.float32)
             
             lon_dataset = self._find_dataset(f, self.LON_CANDIDATES)
             if lon_dataset is not None:
-                lon = lon_dataset[:].astype(np.float32)
+                lon = self._read_direct(lon_dataset, dtype=np.float32)
             
             if lat is None or lon is None:
                 logger.warning("Lat/Lon not found - using synthetic coordinates")
@@ -170,11 +291,7 @@ class InferencePipeline:
     
     def _create_synthetic_coords(self, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
         """Create synthetic lat/lon grids for data without geolocation."""
-        h, w = shape
-        lat_1d = np.linspace(30.0, 0.0, h)  # North to South
-        lon_1d = np.linspace(60.0, 100.0, w)  # West to East
-        lon_grid, lat_grid = np.meshgrid(lon_1d, lat_1d)
-        return lat_grid.astype(np.float32), lon_grid.astype(np.float32)
+        return _synthetic_coords(*shape)
     
     def _load_image(self, image_path: str) -> np.ndarray:
         """Load image file (PNG/JPG) for inference."""
@@ -188,22 +305,79 @@ class InferencePipeline:
     
     def _normalize_bt(self, irbt: np.ndarray) -> np.ndarray:
         """Normalize BT to [0, 1] using physics-based bounds."""
-        normalized = (irbt - self.MIN_BT) / (self.MAX_BT - self.MIN_BT)
-        return np.clip(normalized, 0, 1).astype(np.float32)
+        # One float32 output buffer, then in-place scale and clip: no
+        # intermediate arrays and no trailing astype copy
+        normalized = np.subtract(irbt, self.MIN_BT, dtype=np.float32)
+        normalized *= self.BT_SCALE
+        return np.clip(normalized, 0, 1, out=normalized)
+    
+    def _resize_for_model(self, normalized: np.ndarray) -> np.ndarray:
+        """Resize a normalized frame to the model input size."""
+        # Area averaging for shrinking (full-disc 2816 → 512): faster than
+        # bilinear there and free of its aliasing; bilinear for upscaling
+        if self.IMG_SIZE < min(normalized.shape[:2]):
+            interpolation = cv2.INTER_AREA
+        else:
+            interpolation = cv2.INTER_LINEAR
+        return cv2.resize(normalized, (self.IMG_SIZE, self.IMG_SIZE), interpolation=interpolation)
     
     def _prepare_tensor(self, normalized: np.ndarray) -> torch.Tensor:
         """Resize and convert to model input tensor."""
-        resized = cv2.resize(normalized, (self.IMG_SIZE, self.IMG_SIZE), interpolation=cv2.INTER_LINEAR)
+        resized = self._resize_for_model(normalized)
         tensor = torch.from_numpy(resized).unsqueeze(0).unsqueeze(0).float()
         return tensor.to(self.device)
     
+    def _autocast(self):
+        """
+        Mixed-precision context for the U-Net forward pass.
+        
+        BT inputs are normalized to [0, 1], well within bf16 range/precision,
+        so CUDA runs the network in bf16 (fp16 on GPUs without bf16) and MPS
+        in fp16 where this torch build supports MPS autocast. Sigmoid and
+        thresholding stay in fp32. CPU runs in fp32 as before.
+        """
+        if self.device == "cuda":
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            return torch.autocast(device_type="cuda", dtype=dtype)
+        if self.device == "mps" and self._mps_autocast_available():
+            return torch.autocast(device_type="mps", dtype=torch.float16)
+        return torch.autocast(device_type="cpu", enabled=False)
+    
+    @staticmethod
+    def _mps_autocast_available() -> bool:
+        """MPS autocast needs torch >= 2.4 (older builds reject the device type)."""
+        is_available = getattr(torch.amp, "is_autocast_available", None)
+        return is_available is not None and is_available("mps")
+    
     def _run_model_inference(self, tensor: torch.Tensor) -> np.ndarray:
         """Run model inference, return 512x512 probability map."""
         model = self._load_model()
         
-        with torch.no_grad():
+        with torch.no_grad(), self._autocast():
             output = model(tensor)
-            prob = torch.sigmoid(output).squeeze().cpu().numpy()
+        prob = torch.sigmoid(output.float()).squeeze().cpu().numpy()
+        
+        return prob
+    
+    def warm_up(self):
+        """Run one blank frame through the model so the first real job skips lazy setup."""
+        self._run_model_inference_batch([np.zeros((self.IMG_SIZE, self.IMG_SIZE), dtype=np.float32)])
+    
+    def _run_model_inference_batch(self, frames: List[np.ndarray]) -> np.ndarray:
+        """Run one forward pass over resized (512,512) frames, return (B,512,512) probabilities."""
+        model = self._load_model()
+        
+        # Fill one host batch and move it to the device in a single copy.
+        # On CUDA the batch is page-locked so the copy is a true async DMA.
+        pinned = self.device == "cuda"
+        batch = torch.empty((len(frames), 1, self.IMG_SIZE, self.IMG_SIZE),
+                            dtype=torch.float32, pin_memory=pinned)
+        for i, frame in enumerate(frames):
+            batch[i, 0] = torch.from_numpy(frame)
+        
+        with torch.no_grad(), self._autocast():
+            output = model(batch.to(self.device, non_blocking=pinned))
+        prob = torch.sigmoid_(output.float()).squeeze(1).cpu().numpy()
         
         return prob
     
@@ -238,12 +412,12 @@ class InferencePipeline:
         
         # 2. THRESHOLD - Direct from model (NO BT INTERSECTION)
         # The model already learned physics-based patterns from training
-        binary_mask = (prob_native > self.PROB_THRESHOLD).astype(np.uint8)
+        # (bool → uint8 is a zero-copy view, not a second pass)
+        binary_mask = (prob_native > self.PROB_THRESHOLD).view(np.uint8)
         
         # 3. MORPHOLOGICAL CLEANUP
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        cleaned = cv2.morphologyEx(binary_mask, cv2.MORPH_CLOSE, kernel, iterations=2)
-        cleaned = cv2.morphologyEx(cleaned, cv2.MORPH_OPEN, kernel, iterations=1)
+        cleaned = cv2.morphologyEx(binary_mask, cv2.MORPH_CLOSE, MORPH_KERNEL, iterations=2)
+        cv2.morphologyEx(cleaned, cv2.MORPH_OPEN, MORPH_KERNEL, dst=cleaned, iterations=1)
         
         # 4. CONNECTED COMPONENT ANALYSIS
         labeled, num_features = ndimage.label(cleaned)
@@ -251,43 +425,63 @@ class InferencePipeline:
         # 5. AREA FILTERING with correct pixel area
         pixel_area_km2 = self.PIXEL_RESOLUTION_KM ** 2  # 16 km²
         
-        valid_mask = np.zeros_like(cleaned)
         detections = []
         
-        for label_id in range(1, num_features + 1):
-            region_mask = (labeled == label_id)
-            pixel_count = np.sum(region_mask)
-            area_km2 = pixel_count * pixel_area_km2
-            
-            if area_km2 >= self.MIN_AREA_KM2:
-                valid_mask[region_mask] = 1
-                
-                # Compute centroid
-                y_coords, x_coords = np.where(region_mask)
-                centroid_lat = float(np.mean(lat[y_coords, x_coords]))
-                centroid_lon = float(np.mean(lon[y_coords, x_coords]))
-                
-                # Compute mean BT for info (but NOT for filtering)
-                mean_bt = float(np.mean(irbt[region_mask]))
-                min_bt = float(np.min(irbt[region_mask]))
-                
-                detections.append({
-                    'cluster_id': len(detections) + 1,
-                    'area_km2': float(area_km2),
-                    'pixel_count': int(pixel_count),
-                    'centroid_lat': centroid_lat,
-                    'centroid_lon': centroid_lon,
-                    'mean_bt': mean_bt,
-                    'min_bt': min_bt,
-                    'radius_km': float(np.sqrt(area_km2 / np.pi)),
-                    # TCC Classification: min_bt < 235K is strong TCC indicator
-                    'is_tcc': bool(min_bt < 235.0),
-                    'classification': (
-                        'Confirmed TCC' if min_bt < 220.0 else
-                        'Likely TCC' if min_bt < 235.0 else
-                        'Cloud Cluster'
-                    )
-                })
+        # Per-label pixel counts and lat/lon/BT sums in one linear scan each,
+        # instead of a gather + mean per component
+        flat_labels = labeled.ravel()
+        counts = np.bincount(flat_labels, minlength=num_features + 1)
+        lat_sums = np.bincount(flat_labels, weights=lat.ravel(), minlength=num_features + 1)
+        lon_sums = np.bincount(flat_labels, weights=lon.ravel(), minlength=num_features + 1)
+        bt_sums = np.bincount(flat_labels, weights=irbt.ravel(), minlength=num_features + 1)
+        
+        areas_km2 = counts * pixel_area_km2
+        valid_ids = np.flatnonzero(areas_km2[1:] >= self.MIN_AREA_KM2) + 1
+        
+        # Min BT for all surviving components in a single labelled reduction
+        min_bts = ndimage.minimum(irbt, labeled, valid_ids) if len(valid_ids) else []
+        
+        # Lookup table renumbers surviving components 1..N in detection order
+        # (dropped ones → 0), so the filtered mask and its labels come from a
+        # single gather rather than a pass per component
+        relabel = np.zeros(num_features + 1, dtype=labeled.dtype)
+        relabel[valid_ids] = np.arange(1, len(valid_ids) + 1, dtype=labeled.dtype)
+        detection_labels = relabel[labeled]
+        valid_mask = (detection_labels > 0).view(np.uint8)
+        
+        # Per-cluster columns are computed as arrays; .tolist() hands back
+        # native Python scalars, so no per-field float()/int() casts are needed
+        valid_counts = counts[valid_ids]
+        valid_areas = areas_km2[valid_ids]
+        columns = zip(
+            valid_counts.tolist(),
+            valid_areas.tolist(),
+            (lat_sums[valid_ids] / valid_counts).tolist(),
+            (lon_sums[valid_ids] / valid_counts).tolist(),
+            # Mean BT is for info (NOT for filtering)
+            (bt_sums[valid_ids] / valid_counts).tolist(),
+            np.asarray(min_bts, dtype=np.float64).tolist(),
+            np.sqrt(valid_areas / np.pi).tolist(),
+        )
+        
+        for pixel_count, area_km2, centroid_lat, centroid_lon, mean_bt, min_bt, radius_km in columns:
+            detections.append({
+                'cluster_id': len(detections) + 1,
+                'area_km2': area_km2,
+                'pixel_count': pixel_count,
+                'centroid_lat': centroid_lat,
+                'centroid_lon': centroid_lon,
+                'mean_bt': mean_bt,
+                'min_bt': min_bt,
+                'radius_km': radius_km,
+                # TCC Classification: min_bt < 235K is strong TCC indicator
+                'is_tcc': bool(min_bt < 235.0),
+                'classification': (
+                    'Confirmed TCC' if min_bt < 220.0 else
+                    'Likely TCC' if min_bt < 235.0 else
+                    'Cloud Cluster'
+                )
+            })
         
         logger.info(f"Post-processing: {num_features} components → {len(detections)} valid TCCs (area >= {self.MIN_AREA_KM2} km²)")
         
@@ -295,8 +489,12 @@ class InferencePipeline:
             'probability_native': prob_native,
             'binary_mask': binary_mask,
             'final_mask': valid_mask,
+            'detection_labels': detection_labels,
+            # Kept pixels are the surviving component sizes: no pass over the mask
+            'tcc_pixels': int(valid_counts.sum()),
             'detections': detections,
-            'total_tcc_area_km2': sum(d['area_km2'] for d in detections)
+            # Reduced on the area column already in hand, not the dict list
+            'total_tcc_area_km2': float(valid_areas.sum())
         }
     
     def _extract_timestamp(self, file_path: str) -> datetime:
@@ -304,9 +502,9 @@ class InferencePipeline:
         basename = os.path.basename(file_path)
         try:
             parts = basename.split('_')
-            date_str = parts[1]
-            time_str = parts[2]
-            return datetime.strptime(f"{date_str}_{time_str}", "%d%b%Y_%H%M")
+            m = _TS_RE.fullmatch(f"{parts[1]}_{parts[2]}")
+            day, month, year, hour, minute = m.groups()
+            return datetime(int(year), _MONTHS[month.upper()], int(day), int(hour), int(minute))
         except:
             return datetime.now()
     
@@ -317,35 +515,41 @@ class InferencePipeline:
     
     def _save_mask_png(self, mask: np.ndarray, output_path: str):
         """Save visual mask as .png."""
-        plt.figure(figsize=(8, 8))
-        plt.imshow(mask, cmap='gray')
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(output_path, bbox_inches='tight', pad_inches=0, dpi=150)
-        plt.close()
+        # Colormap straight to pixels: no figure/axes and no tight-bbox re-render.
+        # Nearest-neighbour scaling keeps the dimensions the figure used to produce
+        h, w = mask.shape[:2]
+        scale = self.MASK_PNG_SIZE / max(h, w)
+        scaled = cv2.resize(np.asarray(mask, dtype=np.uint8), (int(w * scale), int(h * scale)),
+                            interpolation=cv2.INTER_NEAREST)
+        plt.imsave(output_path, scaled, cmap='gray', vmin=0, vmax=1)
         logger.info(f"Saved: {output_path}")
     
     def _save_satellite_image(self, irbt: np.ndarray, output_path: str):
         """Save original satellite IRBT image as .png."""
-        plt.figure(figsize=(10, 10))
-        plt.imshow(irbt, cmap='gray_r', vmin=180, vmax=320)
-        plt.colorbar(label='Brightness Temperature (K)', shrink=0.8)
-        plt.title('IR Brightness Temperature')
-        plt.axis('off')
-        plt.tight_layout()
-        plt.savefig(output_path, bbox_inches='tight', dpi=150)
-        plt.close()
+        # Bare Figure: no pyplot figure-manager registration or teardown
+        fig = Figure(figsize=(10, 10))
+        ax = fig.subplots()
+        im = ax.imshow(irbt, cmap='gray_r', vmin=180, vmax=320)
+        fig.colorbar(im, ax=ax, label='Brightness Temperature (K)', shrink=0.8)
+        ax.set_title('IR Brightness Temperature')
+        ax.axis('off')
+        fig.tight_layout()
+        # tight_layout() doesn't crop the canvas; the tight bbox trims the
+        # margins a non-square frame leaves in the square figure
+        fig.savefig(output_path, bbox_inches='tight', dpi=150)
         logger.info(f"Saved: {output_path}")
     
     def _save_overlay_visualization(self, irbt: np.ndarray, mask: np.ndarray, 
                                      detections: List[Dict], output_path: str,
-                                     timestamp_str: str = None):
+                                     timestamp_str: str = None,
+                                     labels: Optional[np.ndarray] = None):
         """
         Save high-quality visualization with TCC detections annotated.
         Left: IR Brightness Temperature with detection contours
         Right: TCC Mask with cluster labels
         """
-        fig, ax = plt.subplots(1, 2, figsize=(16, 7), facecolor='#0a0a1a')
+        fig = Figure(figsize=(16, 7), facecolor='#0a0a1a')
+        ax = fig.subplots(1, 2)
         
         for a in ax:
             a.set_facecolor('#0a0a1a')
@@ -355,46 +559,42 @@ class InferencePipeline:
         title_left = f'IR Brightness Temp ({timestamp_str})' if timestamp_str else 'IR Brightness Temp'
         ax[0].set_title(title_left, color='white', fontsize=12, fontweight='bold')
         ax[0].axis('off')
-        cbar1 = plt.colorbar(im1, ax=ax[0], fraction=0.046, pad=0.04)
+        cbar1 = fig.colorbar(im1, ax=ax[0], fraction=0.046, pad=0.04)
         cbar1.set_label('Temperature (K)', color='white', fontsize=9)
         cbar1.ax.yaxis.set_tick_params(color='white')
         plt.setp(cbar1.ax.yaxis.get_ticklabels(), color='white', fontsize=8)
         
         # Draw contours of detected TCCs on IR image
-        if mask.sum() > 0:
+        has_tcc = bool(mask.any())
+        if has_tcc:
             ax[0].contour(mask, levels=[0.5], colors=['red'], linewidths=1.5)
         
         # RIGHT: TCC Mask with cluster labels
-        # Use a custom colormap: dark background, bright cyan for TCC
-        from matplotlib.colors import ListedColormap
-        tcc_cmap = ListedColormap(['#0a0a1a', '#00e5ff'])
-        ax[1].imshow(mask, cmap=tcc_cmap, vmin=0, vmax=1)
+        ax[1].imshow(mask, cmap=TCC_CMAP, vmin=0, vmax=1)
         ax[1].set_title('TCC Detection Mask', color='white', fontsize=12, fontweight='bold')
         ax[1].axis('off')
         
         # Annotate each detection with cluster ID
-        for d in detections:
-            # Convert lat/lon to approximate pixel coordinates
-            # (Using centroid info for labeling)
-            y_coords, x_coords = np.where(mask > 0)
-            if len(y_coords) > 0:
-                # Find the connected component closest to this detection's centroid
-                from scipy import ndimage
-                labeled, _ = ndimage.label(mask)
-                for label_id in range(1, labeled.max() + 1):
-                    region = (labeled == label_id)
-                    ry, rx = np.where(region)
-                    cy, cx = np.mean(ry), np.mean(rx)
-                    # Label the cluster
-                    if label_id == d['cluster_id']:
-                        classification = d.get('classification', 'TCC')
-                        short_class = '✓' if 'Confirmed' in classification else '~' if 'Likely' in classification else '?'
-                        label_text = f"TCC-{d['cluster_id']} {short_class}"
-                        ax[1].annotate(label_text, (cx, cy), 
-                                      color='white', fontsize=7, fontweight='bold',
-                                      ha='center', va='center',
-                                      bbox=dict(boxstyle='round,pad=0.2', facecolor='#00000088', edgecolor='#00e5ff'))
-                        break
+        # Label k is detection k: either the labels _apply_post_processing
+        # already built, or a relabel of the mask in the same raster order.
+        # Centroids come from center_of_mass rather than pixel coordinates
+        if detections and has_tcc:
+            if labels is not None:
+                labeled, num_labels = labels, len(detections)
+            else:
+                labeled, num_labels = ndimage.label(mask)
+            centers = ndimage.center_of_mass(mask, labeled, range(1, num_labels + 1))
+            for d in detections:
+                if not 1 <= d['cluster_id'] <= num_labels:
+                    continue
+                cy, cx = centers[d['cluster_id'] - 1]
+                classification = d.get('classification', 'TCC')
+                short_class = '✓' if 'Confirmed' in classification else '~' if 'Likely' in classification else '?'
+                label_text = f"TCC-{d['cluster_id']} {short_class}"
+                ax[1].annotate(label_text, (cx, cy), 
+                              color='white', fontsize=7, fontweight='bold',
+                              ha='center', va='center',
+                              bbox=dict(boxstyle='round,pad=0.2', facecolor='#00000088', edgecolor='#00e5ff'))
         
         # Summary text
         total_area = sum(d.get('area_km2', 0) for d in detections)
@@ -404,9 +604,8 @@ class InferencePipeline:
                 color='#00e5ff', fontsize=10, fontweight='bold',
                 bbox=dict(boxstyle='round,pad=0.5', facecolor='#0a0a1a', edgecolor='#00e5ff44'))
         
-        plt.tight_layout(rect=[0, 0.05, 1, 1])
-        plt.savefig(output_path, dpi=200, facecolor='#0a0a1a', bbox_inches='tight')
-        plt.close()
+        fig.tight_layout(rect=[0, 0.05, 1, 1])
+        fig.savefig(output_path, dpi=200, facecolor='#0a0a1a', bbox_inches='tight')
         logger.info(f"Saved comparison: {output_path}")
     
     def _save_netcdf(self, irbt: np.ndarray, prob: np.ndarray, mask: np.ndarray,
@@ -471,7 +670,19 @@ class InferencePipeline:
             }
         )
         
-        ds.to_netcdf(output_path, engine="netcdf4")
+        # Chunk in blocks of whole rows (~1 MiB per chunk) with light zlib
+        # compression; the mask and probability fields shrink dramatically
+        rows_per_chunk = max(1, min(h, (1 << 20) // (w * 4)))
+        compression = {"zlib": True, "complevel": 1, "shuffle": True}
+        encoding = {
+            name: {**compression, "chunksizes": (1, rows_per_chunk, w)}
+            for name in ("irbt", "tcc_probability", "tcc_mask")
+        }
+        if lat is not None and lon is not None:
+            for name in ("latitude", "longitude"):
+                encoding[name] = {**compression, "chunksizes": (rows_per_chunk, w)}
+        
+        ds.to_netcdf(output_path, engine="netcdf4", encoding=encoding)
         logger.info(f"Saved: {output_path}")
     
     def process_file(self, h5_path: str, output_dir: str, analysis_id: str = None) -> dict:
@@ -482,78 +693,204 @@ class InferencePipeline:
             dict with success status, output paths, detections, and input_type
         """
         try:
-            if analysis_id is None:
-                timestamp = self._extract_timestamp(h5_path)
-                analysis_id = timestamp.strftime("%Y%m%d_%H%M")
-            
-            file_output_dir = os.path.join(output_dir, analysis_id)
-            os.makedirs(file_output_dir, exist_ok=True)
-            
-            logger.info(f"Processing H5: {os.path.basename(h5_path)}")
-            
-            # 1. Load data at native resolution
-            irbt, lat, lon = self._load_h5(h5_path)
-            timestamp = self._extract_timestamp(h5_path)
-            
-            logger.info(f"Input shape: {irbt.shape}, BT range: {irbt.min():.1f}K - {irbt.max():.1f}K")
-            
-            # 2. Normalize and prepare tensor
-            normalized = self._normalize_bt(irbt)
-            tensor = self._prepare_tensor(normalized)
+            # 1-2. Load data at native resolution, normalize and resize
+            irbt, lat, lon, frame = self._load_h5_frame(h5_path)
             
             # 3. Run model inference (512x512)
-            prob_512 = self._run_model_inference(tensor)
-            
-            # 4. CORRECTED post-processing
-            results = self._apply_post_processing(prob_512, irbt, lat, lon)
-            
-            final_mask = results['final_mask']
-            prob_native = results['probability_native']
-            detections = results['detections']
+            prob_512 = self._run_model_inference_batch([frame])[0]
             
-            tcc_pixels = int(np.sum(final_mask))
-            
-            logger.info(f"TCC detections: {len(detections)}, Total area: {results['total_tcc_area_km2']:,.0f} km²")
-            
-            # 5. Save outputs
-            satellite_png_path = os.path.join(file_output_dir, "satellite.png")
-            mask_npy_path = os.path.join(file_output_dir, "mask.npy")
-            mask_png_path = os.path.join(file_output_dir, "mask.png")
-            overlay_path = os.path.join(file_output_dir, "overlay.png")
-            netcdf_path = os.path.join(file_output_dir, "output.nc")
+            # 4-5. Post-processing and outputs
+            return self._finish_h5_file(h5_path, output_dir, analysis_id, irbt, lat, lon, prob_512)
             
+        except Exception as e:
+            return self._h5_failure(e)
+    
+    def _load_h5_frame(self, h5_path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Load an H5 file and build its resized (512x512) model input frame."""
+        logger.info(f"Processing H5: {os.path.basename(h5_path)}")
+        
+        irbt, lat, lon = self._load_h5(h5_path)
+        
+        if logger.isEnabledFor(logging.INFO):
+            # minMaxLoc finds both extremes in one pass over the frame
+            bt_min, bt_max, _, _ = cv2.minMaxLoc(irbt)
+            logger.info(f"Input shape: {irbt.shape}, BT range: {bt_min:.1f}K - {bt_max:.1f}K")
+        
+        normalized = self._normalize_bt(irbt)
+        return irbt, lat, lon, self._resize_for_model(normalized)
+    
+    def _finish_h5_file(self, h5_path: str, output_dir: str, analysis_id: Optional[str],
+                        irbt: np.ndarray, lat: np.ndarray, lon: np.ndarray,
+                        prob_512: np.ndarray) -> dict:
+        """Post-process a model probability map and write all outputs for one H5 file."""
+        timestamp = self._extract_timestamp(h5_path)
+        if analysis_id is None:
+            analysis_id = timestamp.strftime("%Y%m%d_%H%M")
+        
+        file_output_dir = os.path.join(output_dir, analysis_id)
+        os.makedirs(file_output_dir, exist_ok=True)
+        
+        # 4. CORRECTED post-processing
+        results = self._apply_post_processing(prob_512, irbt, lat, lon)
+        
+        final_mask = results['final_mask']
+        prob_native = results['probability_native']
+        detections = results['detections']
+        
+        tcc_pixels = results['tcc_pixels']
+        
+        logger.info(f"TCC detections: {len(detections)}, Total area: {results['total_tcc_area_km2']:,.0f} km²")
+        
+        # 5. Save outputs
+        satellite_png_path = os.path.join(file_output_dir, "satellite.png")
+        mask_npy_path = os.path.join(file_output_dir, "mask.npy")
+        mask_png_path = os.path.join(file_output_dir, "mask.png")
+        overlay_path = os.path.join(file_output_dir, "overlay.png")
+        netcdf_path = os.path.join(file_output_dir, "output.nc")
+        
+        # The .npy and NetCDF writes are plain I/O, so they run on worker
+        # threads while the PNGs render here (matplotlib is not thread-safe)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            file_writes = [
+                executor.submit(self._save_mask_npy, final_mask, mask_npy_path),
+                executor.submit(self._save_netcdf, irbt, prob_native, final_mask,
+                                lat, lon, timestamp, detections, netcdf_path),
+            ]
             self._save_satellite_image(irbt, satellite_png_path)
-            self._save_mask_npy(final_mask, mask_npy_path)
             self._save_mask_png(final_mask, mask_png_path)
             timestamp_str = timestamp.strftime("%Y%m%d_%H%M")
-            self._save_overlay_visualization(irbt, final_mask, detections, overlay_path, timestamp_str)
-            self._save_netcdf(irbt, prob_native, final_mask, lat, lon, timestamp, detections, netcdf_path)
-            
-            return {
-                "success": True,
-                "analysis_id": analysis_id,
-                "input_type": "h5",
-                "tcc_pixels": tcc_pixels,
-                "tcc_count": len(detections),
-                "total_area_km2": results['total_tcc_area_km2'],
-                "detections": detections,
-                "outputs": {
-                    "satellite_png": satellite_png_path,
-                    "mask_npy": mask_npy_path,
-                    "mask_png": mask_png_path,
-                    "overlay_png": overlay_path,
-                    "netcdf": netcdf_path
-                }
+            self._save_overlay_visualization(irbt, final_mask, detections, overlay_path, timestamp_str,
+                                             labels=results['detection_labels'])
+            for write in file_writes:
+                write.result()
+        
+        return {
+            "success": True,
+            "analysis_id": analysis_id,
+            "input_type": "h5",
+            "tcc_pixels": tcc_pixels,
+            "tcc_count": len(detections),
+            "total_area_km2": results['total_tcc_area_km2'],
+            "detections": detections,
+            "outputs": {
+                "satellite_png": satellite_png_path,
+                "mask_npy": mask_npy_path,
+                "mask_png": mask_png_path,
+                "overlay_png": overlay_path,
+                "netcdf": netcdf_path
             }
+        }
+    
+    def _h5_failure(self, e: Exception) -> dict:
+        """Log an H5 processing error and build the failure result."""
+        logger.error(f"H5 processing error: {e}")
+        traceback.print_exc()
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    
+    def process_files(self, jobs: List[Tuple[str, str]], output_dir: str,
+                      executor: Optional[ProcessPoolExecutor] = None) -> List[dict]:
+        """
+        Process several H5 files.
+        
+        On a GPU the frames go through the model in mini-batches from this
+        process (see process_files_batched). On CPU each file is independent,
+        so the load → inference → post-processing → output chain runs in
+        parallel worker processes, each loading its own copy of the model
+        (torch modules don't pickle cheaply).
+        
+        Args:
+            jobs: list of (h5_path, analysis_id) pairs
+            output_dir: root output directory
+            executor: long-lived worker_pool() to reuse; by default a pool is
+                started for this call and shut down afterwards
+        
+        Returns:
+            list of process_file() results, in the same order as jobs
+        """
+        if self.device != "cpu":
+            return self.process_files_batched(jobs, output_dir)
+        
+        workers = min(len(jobs), self.MAX_WORKERS, os.cpu_count() or 1)
+        if workers <= 1 and executor is None:
+            return [self.process_file(h5_path, output_dir, analysis_id) for h5_path, analysis_id in jobs]
+        
+        # Pool.map-style chunking: fewer IPC round-trips on long directory
+        # scans, while short batches still hand one file to each worker
+        chunksize = max(1, len(jobs) // (max(1, workers) * 4))
+        worker_jobs = [(h5_path, output_dir, analysis_id) for h5_path, analysis_id in jobs]
+        
+        # A caller's pool takes every job, even a single file: its workers
+        # already hold the model and run under their thread cap
+        if executor is not None:
+            return list(executor.map(process_file_in_worker, worker_jobs, chunksize=chunksize))
+        
+        with self.worker_pool(workers) as executor:
+            return list(executor.map(process_file_in_worker, worker_jobs, chunksize=chunksize))
+    
+    def worker_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        """
+        Process pool whose workers each build their own pipeline for this model.
+        
+        Submit process_file_in_worker / process_image_in_worker jobs to it.
+        """
+        # spawn: forking a parent that already initialized CUDA is unsafe
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            # Split the cores between workers instead of each one using all of them
+            initargs=(self.model_path, max(1, (os.cpu_count() or 1) // max_workers))
+        )
+    
+    def process_files_batched(self, jobs: List[Tuple[str, str]], output_dir: str,
+                              batch_size: int = None) -> List[dict]:
+        """
+        Process several H5 files, running the U-Net on mini-batches of frames.
+        
+        One forward pass per batch keeps the GPU busy instead of launching the
+        network once per frame. Loading, post-processing and outputs still run
+        per file, and a file that fails to load only fails its own result.
+        
+        Returns:
+            list of process_file() results, in the same order as jobs
+        """
+        batch_size = batch_size or self.BATCH_SIZE
+        results = []
+        
+        for start in range(0, len(jobs), batch_size):
+            batch_jobs = jobs[start:start + batch_size]
+            batch_results = [None] * len(batch_jobs)
+            frames = []  # (position in batch, irbt, lat, lon, model input frame)
             
-        except Exception as e:
-            logger.error(f"H5 processing error: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            for i, (h5_path, _) in enumerate(batch_jobs):
+                try:
+                    frames.append((i, *self._load_h5_frame(h5_path)))
+                except Exception as e:
+                    batch_results[i] = self._h5_failure(e)
+            
+            if frames:
+                try:
+                    probs = self._run_model_inference_batch([frame[4] for frame in frames])
+                except Exception as e:
+                    failure = self._h5_failure(e)
+                    for frame in frames:
+                        batch_results[frame[0]] = failure
+                else:
+                    for (i, irbt, lat, lon, _), prob_512 in zip(frames, probs):
+                        h5_path, analysis_id = batch_jobs[i]
+                        try:
+                            batch_results[i] = self._finish_h5_file(
+                                h5_path, output_dir, analysis_id, irbt, lat, lon, prob_512
+                            )
+                        except Exception as e:
+                            batch_results[i] = self._h5_failure(e)
+            
+            results.extend(batch_results)
+        
+        return results
     
     def process_image(self, image_path: str, output_dir: str, analysis_id: str = None) -> dict:
         """
@@ -588,7 +925,7 @@ class InferencePipeline:
             final_mask = results['final_mask']
             detections = results['detections']
             
-            tcc_pixels = int(np.sum(final_mask))
+            tcc_pixels = results['tcc_pixels']
             
             logger.info(f"TCC detections: {len(detections)}, Total area: {results['total_tcc_area_km2']:,.0f} km²")
             
@@ -599,7 +936,6 @@ class InferencePipeline:
             overlay_path = os.path.join(file_output_dir, "overlay.png")
             
             # Copy input image as satellite view
-            import shutil
             shutil.copy(image_path, satellite_png_path)
             
             self._save_mask_npy(final_mask, mask_npy_path)
@@ -607,7 +943,8 @@ class InferencePipeline:
             # For images, use filename as timestamp
             basename = os.path.basename(image_path)
             ts_str = os.path.splitext(basename)[0]
-            self._save_overlay_visualization(irbt, final_mask, detections, overlay_path, ts_str)
+            self._save_overlay_visualization(irbt, final_mask, detections, overlay_path, ts_str,
+                                             labels=results['detection_labels'])
             
             return {
                 "success": True,
@@ -628,9 +965,36 @@ class InferencePipeline:
             
         except Exception as e:
             logger.error(f"Image processing error: {e}")
-            import traceback
             traceback.print_exc()
             return {
                 "success": False,
                 "error": str(e)
             }
+
+
+# Per-process pipeline for worker_pool() workers
+_worker_pipeline = None
+
+
+def _init_worker(model_path: str, num_threads: int):
+    """Create the per-process pipeline used by worker_pool() jobs."""
+    global _worker_pipeline
+    torch.set_num_threads(num_threads)
+    _worker_pipeline = InferencePipeline(model_path)
+
+
+def process_file_in_worker(job: Tuple[str, str, str]) -> dict:
+    """Run process_file() for one (h5_path, output_dir, analysis_id) job."""
+    h5_path, output_dir, analysis_id = job
+    return _worker_pipeline.process_file(h5_path, output_dir, analysis_id)
+
+
+def process_image_in_worker(job: Tuple[str, str, str]) -> dict:
+    """Run process_image() for one (image_path, output_dir, analysis_id) job."""
+    image_path, output_dir, analysis_id = job
+    return _worker_pipeline.process_image(image_path, output_dir, analysis_id)
+
+
+def warm_up_worker(_=None):
+    """Warm up this worker's pipeline (see InferencePipeline.warm_up)."""
+    _worker_pipeline.warm_up()
@@ -6,6 +6,9 @@ import logging
 from datetime import datetime
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ===================== OPTIONAL PROGRESS BAR =====================
 try:
@@ -15,6 +18,13 @@ except ImportError:
     HAS_TQDM = False
     print("\n[INFO] tqdm not installed. Progress will be basic.\n")
 
+# ===================== OPTIONAL FAST JSON =====================
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # ===================== API ENDPOINTS =====================
 TOKEN_URL = "https://mosdac.gov.in/download_api/gettoken"
 SEARCH_URL = "https://mosdac.gov.in/apios/datasets.json"
@@ -24,9 +34,13 @@ REFRESH_URL = "https://mosdac.gov.in/download_api/refresh-token"
 LOGOUT_URL = "https://mosdac.gov.in/download_api/logout"
 
 # ===================== JSON FIXER =====================
+# Unescaped backslashes (e.g. Windows paths) that break strict JSON
+_ESCAPE_RE = re.compile(r'(?<!\\)\\(?![\\/"bfnrtu])')
+_QUOTE_RE = re.compile(r'(?<!\\)\\(?=\s*")')
+
 def preprocess_json(raw_json):
-    fixed = re.sub(r'(?<!\\)\\(?![\\/"bfnrtu])', r'\\\\', raw_json)
-    fixed = re.sub(r'(?<!\\)\\(?=\s*")', r'\\\\', fixed)
+    fixed = _ESCAPE_RE.sub(r'\\\\', raw_json)
+    fixed = _QUOTE_RE.sub(r'\\\\', fixed)
     return fixed
 
 # ===================== LOAD CONFIG =====================
@@ -35,11 +49,12 @@ def load_config():
         print("[ERROR] config.json not found")
         sys.exit(1)
 
-    raw = open("config.json", "r").read()
+    with open("config.json", "r", encoding="utf-8") as f:
+        raw = f.read()
     try:
-        cfg = json.loads(raw)
-    except json.JSONDecodeError:
-        cfg = json.loads(preprocess_json(raw))
+        cfg = json_loads(raw)
+    except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
+        cfg = json_loads(preprocess_json(raw))
 
     for key in ["user_credentials", "search_parameters"]:
         if key not in cfg:
@@ -76,6 +91,7 @@ download_path = os.path.abspath(
 use_date_structure = settings.get("organize_by_date", False)
 skip_user_input = settings.get("skip_user_input", False)
 generate_logs = settings.get("generate_error_logs", False)
+max_workers = max(1, int(settings.get("max_workers", 4)))
 
 # ===================== LOGGING =====================
 logger = logging.getLogger("mosdac_downloader")
@@ -93,7 +109,19 @@ if generate_logs:
     logger.propagate = False
 
 # ===================== SESSION =====================
+# Keep-alive pool sized for the search prefetch plus downloads; transient
+# gateway errors on GETs are retried with backoff before surfacing
 session = requests.Session()
+session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False
+    )
+))
 
 # ===================== TOKEN =====================
 def get_token():
@@ -118,7 +146,7 @@ def search_results():
 
     r = session.get(SEARCH_URL, params=params)
     r.raise_for_status()
-    data = r.json()
+    data = json_loads(r.content)
 
     total = data["itemsPerPage"] if count else data["totalResults"]
     size_mb = data["totalSizeMB"]
@@ -126,6 +154,11 @@ def search_results():
     print(f"\nFound {total} files | Total size: {size_mb:.2f} MB")
     return total
 
+def fetch_page(start_index):
+    r = session.get(SEARCH_URL, params={"datasetId": datasetId, "startIndex": start_index})
+    r.raise_for_status()
+    return json_loads(r.content)
+
 # ===================== DOWNLOAD =====================
 def download_file(token, record_id, identifier, prod_date, idx, total):
     headers = {"Authorization": f"Bearer {token}"}
@@ -168,7 +201,8 @@ def download_file(token, record_id, identifier, prod_date, idx, total):
 
     try:
         with open(temp_path, "wb") as f:
-            if HAS_TQDM:
+            # Per-file byte bars only when files download one at a time
+            if HAS_TQDM and max_workers == 1:
                 with tqdm(total=total_size, unit="B", unit_scale=True) as bar:
                     for chunk in r.iter_content(1024 * 1024):
                         if chunk:
@@ -187,6 +221,20 @@ def download_file(token, record_id, identifier, prod_date, idx, total):
             os.remove(temp_path)
         raise
 
+def download_batch(pool, token, jobs, total):
+    # jobs: (idx, search entry) pairs; results come back in job order
+    return list(pool.map(
+        lambda job: download_file(
+            token,
+            job[1]["id"],
+            job[1]["identifier"],
+            job[1].get("updated"),
+            job[0],
+            total
+        ),
+        jobs
+    ))
+
 # ===================== MAIN =====================
 def main():
     total_files = search_results()
@@ -203,38 +251,46 @@ def main():
 
     print(f"Logged in as {username}")
 
-    params = {"datasetId": datasetId}
     idx = 1
     downloaded = 0
-
-    while idx <= total_files:
-        params["startIndex"] = idx
-        r = session.get(SEARCH_URL, params=params)
-        r.raise_for_status()
-        data = r.json()
-
-        for item in data["entries"]:
-            res = download_file(
-                access_token,
-                item["id"],
-                item["identifier"],
-                item.get("updated"),
-                idx,
-                total_files
-            )
-
-            if res == "TOKEN_EXPIRED":
+    still_expired = []
+
+    # One search page is always in flight while the current page's files
+    # download concurrently (I/O-bound, so threads overlap the transfers)
+    with ThreadPoolExecutor(max_workers=1) as prefetcher, \
+            ThreadPoolExecutor(max_workers=max_workers) as downloader:
+        next_page = prefetcher.submit(fetch_page, idx)
+
+        while idx <= total_files:
+            data = next_page.result()
+            next_start = idx + len(data["entries"])
+            if next_start <= total_files:
+                next_page = prefetcher.submit(fetch_page, next_start)
+
+            jobs = list(enumerate(data["entries"], start=idx))
+            results = download_batch(downloader, access_token, jobs, total_files)
+
+            # Refresh once and retry whatever the expired token rejected
+            expired = [job for job, res in zip(jobs, results) if res == "TOKEN_EXPIRED"]
+            if expired:
                 tokens = session.post(REFRESH_URL, json={"refresh_token": refresh_token}).json()
                 access_token = tokens["access_token"]
                 refresh_token = tokens["refresh_token"]
-                continue
-
-            if res:
-                downloaded += 1
-
-            idx += 1
+                retried = download_batch(downloader, access_token, expired, total_files)
+                results += retried
+                # Rejected even with a fresh token: report, don't drop silently
+                for (job_idx, item), res in zip(expired, retried):
+                    if res == "TOKEN_EXPIRED":
+                        print(f"[ERROR] [{job_idx}/{total_files}] {item['identifier']}: token rejected after refresh")
+                        logger.error(f"Token rejected after refresh: {item['identifier']}")
+                        still_expired.append(item["identifier"])
+
+            downloaded += sum(1 for res in results if res is True)
+            idx = next_start
 
     print(f"\nDownload complete. Files downloaded: {downloaded}")
+    if still_expired:
+        print(f"Files not downloaded (token rejected after refresh): {len(still_expired)}")
     session.post(LOGOUT_URL, json={"username": username})
     print("Logged out.")
 
@@ -1,5 +1,5 @@
 
-import json
+import orjson
 import os
 import subprocess
 import logging
@@ -35,8 +35,8 @@ class MosdacManager:
             }
         }
         
-        with open(self.config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(self.config_path, 'wb') as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
             
         logger.info(f"MOSDAC Config generated at {self.config_path}")
         return self.config_path
@@ -70,7 +70,6 @@ class MosdacManager:
 # Singleton instance for the app to use
 # We can point this to a specific folder where the user drops mdapi.py
 MOSDAC_WORK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mosdac_engine")
-if not os.path.exists(MOSDAC_WORK_DIR):
-    os.makedirs(MOSDAC_WORK_DIR)
+os.makedirs(MOSDAC_WORK_DIR, exist_ok=True)
     
 mosdac_manager = MosdacManager(MOSDAC_WORK_DIR)